@@ -6,23 +6,26 @@ FastAPI backend for Google Places business discovery.
 """
 
 import os
+import asyncio
 import csv
 import re
 import uuid
-import time
 import logging
+import functools
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from enum import Enum
+from operator import attrgetter
 from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 
-import requests
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+import httpx
+from aiolimiter import AsyncLimiter
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)-7s | %(message)s', datefmt='%H:%M:%S')
@@ -33,13 +36,31 @@ GOOGLE_PLACES_NEARBY_URL = "https://maps.googleapis.com/maps/api/place/nearbysea
 GOOGLE_PLACES_DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
 DEFAULT_MIN_BUSINESSES = 500
 PAGINATION_DELAY = 2.0
-REQUEST_DELAY = 0.1
+PLACES_QPS = 10
 PREVIEW_LIMIT = 10
+CSV_CHUNK_ROWS = 500
+MAX_CONCURRENT_JOBS = 4
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+MAX_CONCURRENT_SCRAPES = 20
+HTTP_RETRIES = 3
+USER_AGENT = 'Mozilla/5.0'
+SCRAPE_MAX_CONTENT_LENGTH = 512_000
+SCRAPE_READ_LIMIT = 262_144
+MAX_CONCURRENT_DETAILS = 10
+MAX_CONCURRENT_SEARCHES = 4
 
 FAKE_PHONE_PATTERNS = [r'555', r'123-456', r'000-000', r'111-111']
 FAKE_EMAIL_DOMAINS = ['example.com', 'test.com', 'demo.com', 'fake.com', 'sample.com', 'domain.com']
 FAKE_EMAIL_PREFIXES = ['test@', 'demo@', 'example@', 'fake@', 'noreply@']
 
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_NON_DIGITS = str.maketrans('', '', ''.join(chr(c) for c in range(128) if not chr(c).isdigit()))
+_EMAIL_RE = re.compile(r'\b[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}\b')
+_CITY_STATE_RE = re.compile(r',\s*([^,]+),\s*([A-Z]{2})(?:\s*\d{5}|\s*$)')
+_FAKE_PHONE_RE = re.compile('|'.join(FAKE_PHONE_PATTERNS))
+_FAKE_EMAIL_RE = re.compile('^(?:' + '|'.join(re.escape(p) for p in FAKE_EMAIL_PREFIXES) + ')|@(?:' + '|'.join(re.escape(d) for d in FAKE_EMAIL_DOMAINS) + ')$')
+
 CSV_HEADERS = ['Business Name', 'Phone Number', 'Email', 'Website', 'Address', 'City', 'State', 'Search Keyword', 'Google Place ID', 'Email Source', 'Data Completeness Score']
 
 US_STATES = {"AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California", "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota", "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada", "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York", "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming", "DC": "District of Columbia"}
@@ -63,6 +84,9 @@ STATE_CITIES = {
 
 DEFAULT_CITIES = {"AL": [{"city": "Birmingham", "lat": 33.5207, "lng": -86.8025}], "AK": [{"city": "Anchorage", "lat": 61.2181, "lng": -149.9003}], "AR": [{"city": "Little Rock", "lat": 34.7465, "lng": -92.2896}], "CT": [{"city": "Hartford", "lat": 41.7658, "lng": -72.6734}], "DE": [{"city": "Wilmington", "lat": 39.7391, "lng": -75.5398}], "HI": [{"city": "Honolulu", "lat": 21.3069, "lng": -157.8583}], "ID": [{"city": "Boise", "lat": 43.6150, "lng": -116.2023}], "IN": [{"city": "Indianapolis", "lat": 39.7684, "lng": -86.1581}], "IA": [{"city": "Des Moines", "lat": 41.5868, "lng": -93.6250}], "KS": [{"city": "Wichita", "lat": 37.6872, "lng": -97.3301}], "KY": [{"city": "Louisville", "lat": 38.2527, "lng": -85.7585}], "LA": [{"city": "New Orleans", "lat": 29.9511, "lng": -90.0715}], "ME": [{"city": "Portland", "lat": 43.6591, "lng": -70.2568}], "MD": [{"city": "Baltimore", "lat": 39.2904, "lng": -76.6122}], "MA": [{"city": "Boston", "lat": 42.3601, "lng": -71.0589}], "MI": [{"city": "Detroit", "lat": 42.3314, "lng": -83.0458}], "MN": [{"city": "Minneapolis", "lat": 44.9778, "lng": -93.2650}], "MS": [{"city": "Jackson", "lat": 32.2988, "lng": -90.1848}], "MO": [{"city": "Kansas City", "lat": 39.0997, "lng": -94.5786}], "MT": [{"city": "Billings", "lat": 45.7833, "lng": -108.5007}], "NE": [{"city": "Omaha", "lat": 41.2565, "lng": -95.9345}], "NH": [{"city": "Manchester", "lat": 42.9956, "lng": -71.4548}], "NJ": [{"city": "Newark", "lat": 40.7357, "lng": -74.1724}], "NM": [{"city": "Albuquerque", "lat": 35.0844, "lng": -106.6504}], "ND": [{"city": "Fargo", "lat": 46.8772, "lng": -96.7898}], "OK": [{"city": "Oklahoma City", "lat": 35.4676, "lng": -97.5164}], "OR": [{"city": "Portland", "lat": 45.5152, "lng": -122.6784}], "RI": [{"city": "Providence", "lat": 41.8240, "lng": -71.4128}], "SC": [{"city": "Charleston", "lat": 32.7765, "lng": -79.9311}], "SD": [{"city": "Sioux Falls", "lat": 43.5446, "lng": -96.7311}], "UT": [{"city": "Salt Lake City", "lat": 40.7608, "lng": -111.8910}], "VT": [{"city": "Burlington", "lat": 44.4759, "lng": -73.2121}], "VA": [{"city": "Virginia Beach", "lat": 36.8529, "lng": -75.9780}], "WV": [{"city": "Charleston", "lat": 38.3498, "lng": -81.6326}], "WI": [{"city": "Milwaukee", "lat": 43.0389, "lng": -87.9065}], "WY": [{"city": "Cheyenne", "lat": 41.1400, "lng": -104.8202}], "DC": [{"city": "Washington", "lat": 38.9072, "lng": -77.0369}]}
 
+_STATES_RESPONSE = {"states": [{"code": k, "name": v} for k, v in sorted(US_STATES.items(), key=lambda x: x[1])]}
+_CITIES_RESPONSE = {s: {"state": s, "cities": [c['city'] for c in STATE_CITIES.get(s, DEFAULT_CITIES.get(s, []))]} for s in US_STATES}
+
 class GeographyMode(str, Enum):
     STATE = "state"
     CITY = "city"
@@ -85,7 +109,7 @@ class SearchResponse(BaseModel):
     status: str
     message: str
 
-@dataclass
+@dataclass(slots=True)
 class Business:
     business_name: str = ""
     phone_number: str = ""
@@ -99,10 +123,12 @@ class Business:
     email_source: str = ""
     data_completeness_score: int = 0
     
-    def to_dict(self): return asdict(self)
-    def to_csv_row(self): return {'Business Name': self.business_name, 'Phone Number': self.phone_number, 'Email': self.email, 'Website': self.website, 'Address': self.address, 'City': self.city, 'State': self.state, 'Search Keyword': self.search_keyword, 'Google Place ID': self.google_place_id, 'Email Source': self.email_source, 'Data Completeness Score': self.data_completeness_score}
+    def to_dict(self): return {'business_name': self.business_name, 'phone_number': self.phone_number, 'email': self.email, 'website': self.website, 'address': self.address, 'city': self.city, 'state': self.state, 'search_keyword': self.search_keyword, 'google_place_id': self.google_place_id, 'email_source': self.email_source, 'data_completeness_score': self.data_completeness_score}
+
+# Field order matches CSV_HEADERS
+_csv_values = attrgetter(*(f.name for f in fields(Business)))
 
-@dataclass
+@dataclass(slots=True)
 class JobData:
     job_id: str
     status: JobStatus = JobStatus.PENDING
@@ -118,7 +144,7 @@ class JobData:
 
 def slugify(text, max_len=30):
     if not text: return "search"
-    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')[:max_len] or "search"
+    return _SLUG_RE.sub('-', text.lower()).strip('-')[:max_len] or "search"
 
 def generate_csv_filename(job):
     ts = datetime.now().strftime('%Y-%m-%d_%H-%M')
@@ -127,57 +153,83 @@ def generate_csv_filename(job):
     geo = f"{st}_multi-city" if job.config.get('geographyMode') == 'city' else st
     return f"business_discovery_{ts}_{kw}_{geo}_{len(job.businesses)}rows.csv"
 
+def iter_csv(businesses, chunk_rows=CSV_CHUNK_ROWS):
+    buf = StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_HEADERS)
+    for i, b in enumerate(businesses, 1):
+        writer.writerow(_csv_values(b))
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell(): yield buf.getvalue()
+
 def get_stop_reason_detail(reason):
     return {"Target reached": "Found enough valid businesses to meet your target.", "All locations exhausted": "All cities searched. Try different keywords or state.", "API quota exceeded": "Google API rate limit reached. Wait and retry.", "": "Search completed."}.get(reason, f"Search ended: {reason}")
 
 def is_fake_phone(phone):
     if not phone: return False
-    norm = re.sub(r'[^\d]', '', phone)
+    norm = phone.translate(_NON_DIGITS)
     if '555' in norm: return True
     if len(norm) >= 7 and len(set(norm)) == 1: return True
-    return any(re.search(p, phone) for p in FAKE_PHONE_PATTERNS)
+    return bool(_FAKE_PHONE_RE.search(phone))
 
 def is_fake_email(email):
     if not email: return False
-    e = email.lower()
-    return any(e.endswith('@' + d) for d in FAKE_EMAIL_DOMAINS) or any(e.startswith(p) for p in FAKE_EMAIL_PREFIXES)
+    return bool(_FAKE_EMAIL_RE.search(email.lower()))
 
 def extract_city_state(address):
     if not address: return "", ""
-    for p in [r',\s*([^,]+),\s*([A-Z]{2})\s*\d{5}', r',\s*([^,]+),\s*([A-Z]{2})\s*$']:
-        m = re.search(p, address)
-        if m: return m.group(1).strip(), m.group(2)
-    return "", ""
+    m = _CITY_STATE_RE.search(address)
+    return (m.group(1).strip(), m.group(2)) if m else ("", "")
 
 def calc_completeness(b):
     return sum(1 for f in [b.phone_number, b.email, b.website, b.address] if f and f.strip())
 
-def extract_emails(text):
-    if not text: return []
-    return [e for e in set(re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text.lower())) if not is_fake_email(e)]
-
-def scrape_email(website, timeout=8):
+def extract_email(text):
+    if not text: return None
+    return next((e for e in (m.group() for m in _EMAIL_RE.finditer(text.lower())) if not is_fake_email(e)), None)
+
+async def read_html(http, url, timeout=8):
+    async with http.stream('GET', url, timeout=timeout, follow_redirects=True) as r:
+        if r.status_code != 200 or not r.headers.get('Content-Type', '').startswith('text/html'): return None
+        if int(r.headers.get('Content-Length') or 0) >= SCRAPE_MAX_CONTENT_LENGTH: return None
+        body = bytearray()
+        async for chunk in r.aiter_bytes():
+            body += chunk
+            if len(body) >= SCRAPE_READ_LIMIT: break
+        return body[:SCRAPE_READ_LIMIT].decode('utf-8', 'ignore')
+
+async def scrape_email(http, website, timeout=8):
     if not website: return None
     if not website.startswith(('http://', 'https://')): website = 'https://' + website
     for page in [website, website.rstrip('/') + '/contact', website.rstrip('/') + '/about']:
         try:
-            r = requests.get(page, headers={'User-Agent': 'Mozilla/5.0'}, timeout=timeout, allow_redirects=True)
-            if r.status_code == 200:
-                emails = extract_emails(r.text)
-                if emails: return emails[0]
-        except: pass
+            email = extract_email(await read_html(http, page, timeout))
+            if email: return email
+        except Exception: pass
     return None
 
 class PlacesClient:
     def __init__(self, api_key):
         self.api_key = api_key
         self.quota_exceeded = False
+        limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits, retries=HTTP_RETRIES)
+        self.http = httpx.AsyncClient(transport=transport, timeout=30, headers={'User-Agent': USER_AGENT})
+        # Per client, not module-level: aiolimiter is bound to one event loop and each job runs its own
+        self.limiter = AsyncLimiter(PLACES_QPS, 1)
+    
+    async def aclose(self):
+        await self.http.aclose()
     
-    def nearby_search(self, lat, lng, keyword, radius=40000, page_token=None):
+    async def nearby_search(self, lat, lng, keyword, radius=40000, page_token=None):
         params = {'key': self.api_key, 'location': f"{lat},{lng}", 'radius': radius, 'keyword': keyword}
         if page_token: params['pagetoken'] = page_token
         try:
-            r = requests.get(GOOGLE_PLACES_NEARBY_URL, params=params, timeout=30)
+            async with self.limiter:
+                r = await self.http.get(GOOGLE_PLACES_NEARBY_URL, params=params)
             data = r.json()
             if data.get('status') == 'OVER_QUERY_LIMIT': self.quota_exceeded = True
             return data
@@ -185,10 +237,10 @@ class PlacesClient:
             logger.error(f"Search error: {e}")
             return {'status': 'ERROR', 'results': []}
     
-    def get_details(self, place_id):
+    async def get_details(self, place_id):
         try:
-            r = requests.get(GOOGLE_PLACES_DETAILS_URL, params={'key': self.api_key, 'place_id': place_id, 'fields': 'name,formatted_phone_number,formatted_address,website'}, timeout=30)
-            time.sleep(REQUEST_DELAY)
+            async with self.limiter:
+                r = await self.http.get(GOOGLE_PLACES_DETAILS_URL, params={'key': self.api_key, 'place_id': place_id, 'fields': 'name,formatted_phone_number,formatted_address,website'})
             return r.json()
         except Exception as e:
             logger.error(f"Details error: {e}")
@@ -200,80 +252,120 @@ class DiscoveryEngine:
         self.job = job
         self.config = config
         self.businesses = {}
-        self.seen_domains = {}
-        self.stats = {'total_searched': 0, 'duplicates': 0, 'fake_phones': 0, 'fake_emails': 0, 'validation_failed': 0, 'emails_scraped': 0}
+        self.seen_domains: set[str] = set()
+        self.stats = {'total_searched': 0, 'duplicates': 0, 'fake_phones': 0, 'fake_emails': 0, 'validation_failed': 0, 'emails_scraped': 0, 'with_phone': 0, 'with_email': 0, 'with_website': 0, 'states_covered': 0}
+        self._states = set()
+        self._scrape_sem = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+        self._details_sem = asyncio.Semaphore(MAX_CONCURRENT_DETAILS)
+        self._inflight = set()
+        self._inflight_domains = set()
     
-    def _get_domain(self, url):
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _get_domain(url):
         if not url: return None
         try: return urlparse(url if url.startswith('http') else f'https://{url}').netloc.lower().replace('www.', '')
-        except: return None
+        except Exception: return None
     
-    def _process_place(self, place, keyword):
+    def _needs_details(self, place):
         pid = place.get('place_id', '')
-        if not pid or pid in self.businesses:
-            self.stats['duplicates'] += 1
-            return None
-        
-        details = self.client.get_details(pid).get('result', {})
+        return bool(pid) and pid not in self.businesses and pid not in self._inflight
+    
+    async def _fetch_details(self, pid):
+        async with self._details_sem: return (await self.client.get_details(pid)).get('result', {})
+    
+    async def _finalize(self, place, details, keyword):
+        pid = place['place_id']
         website = details.get('website', '')
         domain = self._get_domain(website)
-        if domain and domain in self.seen_domains:
-            self.stats['duplicates'] += 1
-            return None
-        
-        b = Business(
-            business_name=details.get('name', place.get('name', '')),
-            phone_number=details.get('formatted_phone_number', ''),
-            address=details.get('formatted_address', place.get('vicinity', '')),
-            website=website, search_keyword=keyword, google_place_id=pid
-        )
-        b.city, b.state = extract_city_state(b.address)
-        
-        if is_fake_phone(b.phone_number):
-            self.stats['fake_phones'] += 1
-            b.phone_number = ""
-        
-        if website:
-            email = scrape_email(website)
-            if email:
-                b.email = email
-                b.email_source = "website_scrape"
-                self.stats['emails_scraped'] += 1
-        
-        if is_fake_email(b.email):
-            self.stats['fake_emails'] += 1
-            b.email = ""
-            b.email_source = ""
-        
-        b.data_completeness_score = calc_completeness(b)
-        if b.data_completeness_score < 2:
-            self.stats['validation_failed'] += 1
-            return None
-        return b
+        if domain:
+            # Reserve before the first await so concurrent places sharing a website are rejected up front
+            if domain in self.seen_domains or domain in self._inflight_domains:
+                self.stats['duplicates'] += 1
+                return None
+            self._inflight_domains.add(domain)
+        try:
+            b = Business(
+                business_name=details.get('name', place.get('name', '')),
+                phone_number=details.get('formatted_phone_number', ''),
+                address=details.get('formatted_address', place.get('vicinity', '')),
+                website=website, search_keyword=keyword, google_place_id=pid
+            )
+            b.city, b.state = extract_city_state(b.address)
+            
+            if is_fake_phone(b.phone_number):
+                self.stats['fake_phones'] += 1
+                b.phone_number = ""
+            
+            if website:
+                async with self._scrape_sem: email = await scrape_email(self.client.http, website)
+                if email:
+                    b.email = email
+                    b.email_source = "website_scrape"
+                    self.stats['emails_scraped'] += 1
+            
+            if is_fake_email(b.email):
+                self.stats['fake_emails'] += 1
+                b.email = ""
+                b.email_source = ""
+            
+            b.data_completeness_score = calc_completeness(b)
+            if b.data_completeness_score < 2:
+                self.stats['validation_failed'] += 1
+                return None
+            self._store(b, domain)
+            return b
+        finally:
+            self._inflight_domains.discard(domain)
+    
+    def _store(self, b, domain):
+        self.businesses[b.google_place_id] = b
+        if domain: self.seen_domains.add(domain)
+        self.stats['with_phone'] += bool(b.phone_number)
+        self.stats['with_email'] += bool(b.email)
+        self.stats['with_website'] += bool(b.website)
+        if b.state:
+            self._states.add(b.state)
+            self.stats['states_covered'] = len(self._states)
     
-    def _search_location(self, city_data, keyword):
+    async def _search_location(self, city_data, keyword):
         lat, lng = city_data['lat'], city_data['lng']
         page_token = None
         while True:
-            resp = self.client.nearby_search(lat, lng, keyword, page_token=page_token)
+            resp = await self.client.nearby_search(lat, lng, keyword, page_token=page_token)
             status = resp.get('status', 'ERROR')
             if status == 'OVER_QUERY_LIMIT':
-                time.sleep(60)
+                await asyncio.sleep(60)
                 if self.client.quota_exceeded: return
                 continue
             if status not in ['OK', 'ZERO_RESULTS']: break
-            for place in resp.get('results', []):
-                self.stats['total_searched'] += 1
-                b = self._process_place(place, keyword)
-                if b:
-                    self.businesses[b.google_place_id] = b
-                    d = self._get_domain(b.website)
-                    if d: self.seen_domains[d] = b.google_place_id
+            places = resp.get('results', [])
+            self.stats['total_searched'] += len(places)
+            pending = list({p['place_id']: p for p in places if self._needs_details(p)}.values())
+            self.stats['duplicates'] += len(places) - len(pending)
+            pids = [p['place_id'] for p in pending]
+            self._inflight.update(pids)
+            try:
+                details_list = await asyncio.gather(*(self._fetch_details(pid) for pid in pids))
+                await asyncio.gather(*(self._finalize(p, d, keyword) for p, d in zip(pending, details_list)))
+            finally:
+                self._inflight.difference_update(pids)
             page_token = resp.get('next_page_token')
             if not page_token: break
-            time.sleep(PAGINATION_DELAY)
+            await asyncio.sleep(PAGINATION_DELAY)
     
-    def run(self):
+    async def _search_task(self, sem, city_data, keyword, state):
+        async with sem:
+            self.job.current_keyword = keyword
+            self.job.current_city = city_data.get('city', 'Unknown')
+            logger.info(f"Searching: {keyword} in {self.job.current_city}, {state}")
+            await self._search_location(city_data, keyword)
+    
+    async def run(self):
+        try: return await self._run()
+        finally: await self.client.aclose()
+    
+    async def _run(self):
         keywords = self.config['keywords']
         state = self.config['state'].upper()
         min_results = self.config.get('minResults', DEFAULT_MIN_BUSINESSES)
@@ -285,30 +377,32 @@ class DiscoveryEngine:
             return []
         
         total_steps = len(keywords) * len(cities)
-        step = 0
-        for keyword in keywords:
-            self.job.current_keyword = keyword
-            for city_data in cities:
-                self.job.current_city = city_data.get('city', 'Unknown')
-                logger.info(f"Searching: {keyword} in {self.job.current_city}, {state}")
-                self._search_location(city_data, keyword)
-                step += 1
+        sem = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+        tasks = [asyncio.create_task(self._search_task(sem, city_data, keyword, state)) for keyword in keywords for city_data in cities]
+        try:
+            for step, task in enumerate(asyncio.as_completed(tasks), 1):
+                await task
                 self.job.progress = int((step / total_steps) * 100)
                 self.job.stats = {**self.stats, 'valid': len(self.businesses)}
                 if len(self.businesses) >= min_results:
                     self.job.stop_reason = "Target reached"
                     self.job.stop_reason_detail = get_stop_reason_detail("Target reached")
                     return self._sorted()
+        finally:
+            for task in tasks: task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         self.job.stop_reason = "All locations exhausted"
         self.job.stop_reason_detail = get_stop_reason_detail("All locations exhausted")
         return self._sorted()
     
     def _sorted(self):
-        r = list(self.businesses.values())
-        r.sort(key=lambda b: (-b.data_completeness_score, b.business_name.lower()))
-        return r
+        rows = list(self.businesses.values())
+        keys = [(-b.data_completeness_score, b.business_name.lower()) for b in rows]
+        return [rows[i] for i in sorted(range(len(rows)), key=keys.__getitem__)]
 
 jobs: Dict[str, JobData] = {}
+# Discovery jobs get their own workers (each running its own event loop) so they never hold Starlette's shared threadpool
+job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS, thread_name_prefix='discovery')
 
 def run_job(job_id, config):
     job = jobs.get(job_id)
@@ -323,7 +417,7 @@ def run_job(job_id, config):
         job.status = JobStatus.RUNNING
         job.config = config
         engine = DiscoveryEngine(api_key, job, config)
-        job.businesses = engine.run()
+        job.businesses = asyncio.run(engine.run())
         job.stats = engine.stats
         job.status = JobStatus.COMPLETED
         job.progress = 100
@@ -334,7 +428,7 @@ def run_job(job_id, config):
         job.stop_reason = "Error"
         job.stop_reason_detail = str(e)
 
-app = FastAPI(title="Business Discovery API", version="2.1.0")
+app = FastAPI(title="Business Discovery API", version="2.1.0", default_response_class=ORJSONResponse)
 
 # CORS Configuration - Allow frontend domains
 allowed_origins = [
@@ -359,19 +453,19 @@ async def health():
 
 @app.get("/api/states")
 async def get_states():
-    return {"states": [{"code": k, "name": v} for k, v in sorted(US_STATES.items(), key=lambda x: x[1])]}
+    return _STATES_RESPONSE
 
 @app.get("/api/cities/{state}")
 async def get_cities(state: str):
     state = state.upper()
-    return {"state": state, "cities": [c['city'] for c in STATE_CITIES.get(state, DEFAULT_CITIES.get(state, []))]}
+    return _CITIES_RESPONSE.get(state) or {"state": state, "cities": []}
 
 @app.post("/api/search", response_model=SearchResponse)
-async def start_search(request: SearchRequest, background_tasks: BackgroundTasks):
+async def start_search(request: SearchRequest):
     job_id = str(uuid.uuid4())[:8]
     job = JobData(job_id=job_id, config={'keywords': request.keywords, 'geographyMode': request.geographyMode.value, 'state': request.state.upper(), 'cities': request.cities, 'minResults': request.minResults})
     jobs[job_id] = job
-    background_tasks.add_task(run_job, job_id, job.config)
+    job_executor.submit(run_job, job_id, job.config)
     return SearchResponse(jobId=job_id, status="started", message=f"Discovery started for {', '.join(request.keywords)} in {request.state}")
 
 @app.get("/api/results/{job_id}")
@@ -381,23 +475,15 @@ async def get_results(job_id: str, preview: int = Query(default=PREVIEW_LIMIT, g
     total = len(job.businesses)
     preview_count = min(preview, total)
     preview_list = [b.to_dict() for b in job.businesses[:preview_count]]
-    wPhone = sum(1 for b in job.businesses if b.phone_number)
-    wEmail = sum(1 for b in job.businesses if b.email)
-    wWeb = sum(1 for b in job.businesses if b.website)
     low_warn = {"message": "Fewer than 10 valid businesses found.", "suggestions": ["Try broader keywords", "Select different state", "Some industries have fewer listings"]} if job.status == JobStatus.COMPLETED and total < 10 else None
-    return {"jobId": job.job_id, "status": job.status.value, "progress": job.progress, "totalValid": total, "previewCount": preview_count, "preview": preview_list, "counts": {"withPhone": wPhone, "withEmail": wEmail, "withWebsite": wWeb, "statesCovered": len(set(b.state for b in job.businesses if b.state)), "totalSearched": job.stats.get('total_searched', 0), "duplicatesRemoved": job.stats.get('duplicates', 0), "fakePhonesFiltered": job.stats.get('fake_phones', 0), "fakeEmailsFiltered": job.stats.get('fake_emails', 0), "validationFailed": job.stats.get('validation_failed', 0), "emailsScraped": job.stats.get('emails_scraped', 0)}, "stopReason": job.stop_reason, "stopReasonDetail": job.stop_reason_detail, "lowResultWarning": low_warn, "currentKeyword": job.current_keyword, "currentCity": job.current_city}
+    return {"jobId": job.job_id, "status": job.status.value, "progress": job.progress, "totalValid": total, "previewCount": preview_count, "preview": preview_list, "counts": {"withPhone": job.stats.get('with_phone', 0), "withEmail": job.stats.get('with_email', 0), "withWebsite": job.stats.get('with_website', 0), "statesCovered": job.stats.get('states_covered', 0), "totalSearched": job.stats.get('total_searched', 0), "duplicatesRemoved": job.stats.get('duplicates', 0), "fakePhonesFiltered": job.stats.get('fake_phones', 0), "fakeEmailsFiltered": job.stats.get('fake_emails', 0), "validationFailed": job.stats.get('validation_failed', 0), "emailsScraped": job.stats.get('emails_scraped', 0)}, "stopReason": job.stop_reason, "stopReasonDetail": job.stop_reason_detail, "lowResultWarning": low_warn, "currentKeyword": job.current_keyword, "currentCity": job.current_city}
 
 @app.get("/api/results/{job_id}/csv")
 async def download_csv(job_id: str):
     job = jobs.get(job_id)
     if not job: raise HTTPException(status_code=404, detail="Job not found")
     if job.status != JobStatus.COMPLETED: raise HTTPException(status_code=400, detail=f"Job not completed ({job.status.value})")
-    output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=CSV_HEADERS, extrasaction='ignore')
-    writer.writeheader()
-    for b in job.businesses: writer.writerow(b.to_csv_row())
-    output.seek(0)
-    return StreamingResponse(iter([output.getvalue()]), media_type="text/csv; charset=utf-8", headers={"Content-Disposition": f'attachment; filename="{generate_csv_filename(job)}"', "X-Total-Rows": str(len(job.businesses))})
+    return StreamingResponse(iter_csv(job.businesses), media_type="text/csv; charset=utf-8", headers={"Content-Disposition": f'attachment; filename="{generate_csv_filename(job)}"', "X-Total-Rows": str(len(job.businesses))})
 
 if __name__ == "__main__":
     import uvicorn